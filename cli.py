@@ -3,17 +3,87 @@ Command-line interface for the PubMed Paper Fetcher.
 """
 
 import argparse
+import gzip
+import os
 import sys
 import logging
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, TextIO
 
 from pubmed_paper_fetcher.pubmed_api import PubMedAPI
 from pubmed_paper_fetcher.paper_processor import PaperProcessor
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Write buffer for the output file; larger than the 8 KiB default to cut syscalls on big CSVs
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+def default_cache_dir() -> str:
+    """
+    Get the default directory for cached efetch records.
+    
+    Resolved when arguments are parsed rather than at import, so PUBMED_CACHE_DIR
+    and the home directory are read from the environment the CLI actually runs in.
+    
+    Returns:
+        PUBMED_CACHE_DIR if set, otherwise ~/.cache/pubmed_paper_fetcher
+    """
+    return os.environ.get(
+        "PUBMED_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "pubmed_paper_fetcher")
+    )
+
+def open_output(path: str, compress: Optional[bool] = None) -> TextIO:
+    """
+    Open the output file for writing CSV.
+    
+    Paths ending in ".gz" are gzip-compressed at level 1, which gives most of
+    the size reduction of the default level 9 at a fraction of the CPU cost.
+    
+    Args:
+        path: Output file path
+        compress: Whether to gzip the output (defaults to whether path ends in ".gz")
+        
+    Returns:
+        Writable text stream
+    """
+    if compress is None:
+        compress = path.endswith(".gz")
+    
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=1)
+    return open(path, 'w', encoding='utf-8', newline='', buffering=OUTPUT_BUFFER_SIZE)
+
+@contextmanager
+def atomic_output(path: str) -> Iterator[TextIO]:
+    """
+    Open the output file so it is only replaced once writing has succeeded.
+    
+    The CSV is written to a temporary file in the same directory and moved
+    onto path when the block exits cleanly. If it raises (a failed search, a
+    network error, Ctrl-C), the temporary file is removed and any previous
+    output at path is left untouched.
+    
+    Args:
+        path: Output file path
+        
+    Yields:
+        Writable text stream
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    
+    try:
+        with open_output(tmp_path, compress=path.endswith(".gz")) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
 def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
     """
     Parse command-line arguments.
@@ -41,7 +111,8 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
     
     parser.add_argument(
         "-f", "--file",
-        help="Specify the filename to save the results (if not provided, print to console)"
+        help="Specify the filename to save the results (if not provided, print to console; "
+             "a .gz suffix writes gzip-compressed output)"
     )
     
     parser.add_argument(
@@ -62,6 +133,19 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
         help="NCBI API key for higher request limits"
     )
     
+    cache_dir = default_cache_dir()
+    parser.add_argument(
+        "--cache-dir",
+        default=cache_dir,
+        help=f"Directory for caching fetched papers (default: {cache_dir})"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Fetch every paper from PubMed without reading or writing the cache"
+    )
+    
     return parser.parse_args(args)
 
 def main(args: Optional[List[str]] = None) -> int:
@@ -76,6 +160,9 @@ def main(args: Optional[List[str]] = None) -> int:
     """
     parsed_args = parse_args(args)
     
+    # Configure logging here rather than at import so library users keep control of it
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    
     # Set logging level based on debug flag
     if parsed_args.debug:
         logger.setLevel(logging.DEBUG)
@@ -86,31 +173,29 @@ def main(args: Optional[List[str]] = None) -> int:
         api = PubMedAPI(
             email=parsed_args.email,
             api_key=parsed_args.api_key,
-            tool="get-papers-list"
+            tool="get-papers-list",
+            cache_dir=None if parsed_args.no_cache else parsed_args.cache_dir
         )
         
         # Initialize paper processor
         processor = PaperProcessor(api, debug=parsed_args.debug)
         
-        # Process papers
+        # Process papers, streaming each one to the output as soon as it is ready
         logger.info(f"Fetching papers for query: {parsed_args.query}")
-        processed_papers = processor.process_papers(
+        papers = processor.iter_papers(
             query=parsed_args.query,
             max_results=parsed_args.max_results
         )
         
-        # Generate CSV
-        csv_content = processor.generate_csv(processed_papers)
-        
         # Output results
         if parsed_args.file:
-            with open(parsed_args.file, 'w', encoding='utf-8') as f:
-                f.write(csv_content)
+            with atomic_output(parsed_args.file) as f:
+                count = processor.write_csv(papers, f)
             logger.info(f"Results saved to {parsed_args.file}")
         else:
-            print(csv_content)
+            count = processor.write_csv(papers, sys.stdout)
         
-        logger.info(f"Found {len(processed_papers)} papers with non-academic affiliations")
+        logger.info(f"Found {count} papers with non-academic affiliations")
         return 0
         
     except KeyboardInterrupt:
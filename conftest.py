@@ -0,0 +1,59 @@
+"""
+Shared pytest configuration for the PubMed Paper Fetcher tests.
+"""
+
+import ast
+from typing import Iterator, List, Tuple
+
+import pytest
+
+@pytest.fixture(autouse=True, scope="session")
+def _disable_tqdm():
+    """Replace the progress bar with the identity function once for the whole session."""
+    import pubmed_paper_fetcher.paper_processor as paper_processor
+    
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(paper_processor, "tqdm", lambda iterable, **kwargs: iterable)
+        yield
+
+def _side_effect_sequences(tree: ast.AST) -> Iterator[Tuple[int, ast.expr]]:
+    """
+    Find list/tuple literals assigned to a mock's side_effect.
+    
+    Covers both `mock.side_effect = [...]` and `side_effect=[...]` keyword arguments.
+    
+    Args:
+        tree: Parsed module
+    
+    Yields:
+        Tuples of (line number, sequence literal)
+    """
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign):
+            if any(isinstance(target, ast.Attribute) and target.attr == "side_effect"
+                   for target in node.targets):
+                if isinstance(node.value, (ast.List, ast.Tuple)):
+                    yield node.lineno, node.value
+        elif isinstance(node, ast.keyword) and node.arg == "side_effect":
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                yield node.value.lineno, node.value
+
+def pytest_collection_modifyitems(config: pytest.Config, items: List[pytest.Item]) -> None:
+    """
+    Reject side_effect sequences that should be a return_value.
+    
+    A side_effect list with fewer than two values, or with identical values,
+    behaves like return_value but pays for iterator dispatch on every call and
+    raises StopIteration once the mock is called more often than expected.
+    """
+    problems = []
+    for path in sorted({item.path for item in items}):
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        for lineno, sequence in _side_effect_sequences(tree):
+            values = [ast.dump(element) for element in sequence.elts]
+            if len(values) < 2 or len(set(values)) == 1:
+                problems.append(f"{path}:{lineno}: side_effect sequence with a single distinct value; "
+                                f"use return_value instead")
+    
+    if problems:
+        raise pytest.UsageError("\n".join(problems))
@@ -2,19 +2,40 @@
 Module for processing PubMed paper data and identifying non-academic affiliations.
 """
 
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Any, TextIO, Tuple
+import asyncio
 import csv
 import logging
 import io
-from datetime import datetime
+import itertools
+import re
+import sys
 from tqdm import tqdm
 
-from pubmed_paper_fetcher.pubmed_api import PubMedAPI
+from pubmed_paper_fetcher.pubmed_api import PubMedAPI, EFETCH_BATCH_SIZE, require_no_running_loop
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Output CSV columns
+CSV_FIELDNAMES = [
+    "PubmedID", 
+    "Title", 
+    "Publication Date", 
+    "Non-academic Author(s)", 
+    "Company Affiliation(s)", 
+    "Corresponding Author Email"
+]
+
+# Same line terminator as the csv module's default dialect
+CSV_LINE_TERMINATOR = "\r\n"
+
+# Characters that make the csv module quote a field
+_CSV_NEEDS_QUOTING = re.compile(r'[,"\r\n]')
+
+# efetch batches fetched concurrently before their papers are yielded; bounds the raw
+# records held in memory to FETCH_WINDOW * EFETCH_BATCH_SIZE however many papers match
+FETCH_WINDOW = 10
+
 class PaperProcessor:
     """Class to process PubMed papers and identify those with non-academic affiliations."""
     
@@ -45,25 +66,110 @@ class PaperProcessor:
         Returns:
             List of processed papers with non-academic affiliations
         """
+        processed_papers = list(self.iter_papers(query, max_results))
+        
+        logger.info(f"Found {len(processed_papers)} papers with non-academic affiliations")
+        return processed_papers
+    
+    def iter_papers(self, query: str, max_results: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        Process papers matching the query, yielding those with non-academic affiliations.
+        
+        Papers are fetched FETCH_WINDOW efetch batches at a time and yielded as
+        they are processed, so callers can stream them to their destination while
+        memory stays bounded by one window of raw records.
+        
+        Args:
+            query: PubMed search query
+            max_results: Maximum number of results to process
+            
+        Yields:
+            Processed papers with non-academic affiliations
+            
+        Raises:
+            RuntimeError: If iterated from a running event loop
+        """
+        require_no_running_loop("iter_papers")
+        
         # Search for papers
         pmids = self.api.search_papers(query, max_results)
         
         # Process each paper
-        processed_papers = []
+        records = self._iter_paper_records(pmids)
+        
+        # The progress bar is only drawn for interactive runs, not when output is redirected
+        progress = tqdm(
+            records,
+            total=len(pmids),
+            desc="Processing papers",
+            disable=not sys.stderr.isatty(),
+            mininterval=0.5
+        )
+        
+        papers = self._skip_missing(progress)
+        
+        results = (self._process_single_paper(pmid, paper_data) for pmid, paper_data in papers)
+        yield from self._non_academic_only(results)
+    
+    def _non_academic_only(
+        self, results: Iterable[Optional[Dict[str, Any]]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Keep only processed papers that have non-academic authors.
+        
+        Args:
+            results: Processed paper data, or None for papers that were dropped
+            
+        Yields:
+            Processed papers with non-academic affiliations
+        """
+        for processed_paper in results:
+            if processed_paper and processed_paper.get("non_academic_authors"):
+                yield processed_paper
+    
+    def _iter_paper_records(self, pmids: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Fetch paper details in concurrent batches and yield them one paper at a time.
+        
+        Batches are fetched FETCH_WINDOW at a time, and each window is yielded
+        before the next one is requested.
+        
+        Args:
+            pmids: PubMed IDs of the papers to fetch
+            
+        Yields:
+            Tuples of (pmid, paper_data)
+        """
+        batches = [
+            pmids[start:start + EFETCH_BATCH_SIZE]
+            for start in range(0, len(pmids), EFETCH_BATCH_SIZE)
+        ]
         
-        for pmid in tqdm(pmids, desc="Processing papers"):
-            paper_data = self.api.fetch_paper_details(pmid)
+        # Full records are needed: ESummary lists author names but not their affiliations,
+        # so papers cannot be filtered on affiliation before efetch
+        for start in range(0, len(batches), FETCH_WINDOW):
+            window = batches[start:start + FETCH_WINDOW]
+            batch_records = asyncio.run(self.api.fetch_batches_async(window))
+            for batch, records in zip(window, batch_records):
+                yield from zip(batch, records)
+    
+    def _skip_missing(
+        self, records: Iterable[Tuple[str, Dict[str, Any]]]
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Drop papers whose details could not be fetched.
+        
+        Args:
+            records: Tuples of (pmid, paper_data)
             
+        Yields:
+            Tuples of (pmid, paper_data) with non-empty paper data
+        """
+        for pmid, paper_data in records:
             if not paper_data:
                 logger.warning(f"Skipping PMID {pmid} due to missing data")
                 continue
-            
-            processed_paper = self._process_single_paper(pmid, paper_data)
-            if processed_paper and processed_paper.get("non_academic_authors"):
-                processed_papers.append(processed_paper)
-        
-        logger.info(f"Found {len(processed_papers)} papers with non-academic affiliations")
-        return processed_papers
+            yield pmid, paper_data
     
     def _process_single_paper(self, pmid: str, paper_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -93,24 +199,36 @@ class PaperProcessor:
             # Extract corresponding author email
             corresponding_email = self.api.extract_corresponding_email(paper_data)
             
-            # Process authors and their affiliations
-            non_academic_authors = []
-            company_affiliations = []
+            # Process authors and their affiliations; dicts act as insertion-ordered sets
+            non_academic_authors: Dict[str, None] = {}
+            company_affiliations: Dict[str, None] = {}
+            
+            # Co-authors often share an affiliation, so classify each distinct one once per paper
+            per_paper_cache: Dict[str, Tuple[bool, Optional[str]]] = {}
+            
+            # Bind lookups to locals once; this loop runs for every author affiliation
+            format_name = self._format_author_name
+            cached_classification = per_paper_cache.get
+            classify_affiliation = self.api.is_non_academic_affiliation
             
-            if "AuthorList" in article_data:
-                for author in article_data["AuthorList"]:
-                    author_name = self._format_author_name(author)
+            for author in article_data.get("AuthorList") or ():
+                affiliation_infos = author.get("AffiliationInfo") or ()
+                if not affiliation_infos:
+                    continue
+                
+                author_name = format_name(author)
+                
+                # Process affiliations
+                for affiliation_info in affiliation_infos:
+                    affiliation = affiliation_info.get("Affiliation", "")
+                    classification = cached_classification(affiliation)
+                    if classification is None:
+                        classification = per_paper_cache[affiliation] = classify_affiliation(affiliation)
+                    is_non_academic, company_name = classification
                     
-                    # Process affiliations
-                    if "AffiliationInfo" in author:
-                        for affiliation_info in author["AffiliationInfo"]:
-                            affiliation = affiliation_info.get("Affiliation", "")
-                            is_non_academic, company_name = self.api.is_non_academic_affiliation(affiliation)
-                            
-                            if is_non_academic and company_name:
-                                non_academic_authors.append(author_name)
-                                if company_name not in company_affiliations:
-                                    company_affiliations.append(company_name)
+                    if is_non_academic and company_name:
+                        non_academic_authors[author_name] = None
+                        company_affiliations[company_name] = None
             
             # Only return papers with non-academic affiliations
             if non_academic_authors:
@@ -118,18 +236,19 @@ class PaperProcessor:
                     "PubmedID": pmid,
                     "Title": title,
                     "Publication Date": pub_date,
-                    "non_academic_authors": "; ".join(set(non_academic_authors)),
-                    "company_affiliations": "; ".join(set(company_affiliations)),
+                    "non_academic_authors": "; ".join(non_academic_authors),
+                    "company_affiliations": "; ".join(company_affiliations),
                     "corresponding_email": corresponding_email or "Not available"
                 }
             
             return None
-            
+        
         except Exception as e:
             logger.error(f"Error processing paper {pmid}: {str(e)}")
             return None
     
-    def _format_author_name(self, author: Dict[str, Any]) -> str:
+    @staticmethod
+    def _format_author_name(author: Dict[str, Any]) -> str:
         """
         Format author name from PubMed data.
         
@@ -150,7 +269,8 @@ class PaperProcessor:
         else:
             return "Unknown Author"
     
-    def _extract_publication_date(self, article_data: Dict[str, Any]) -> str:
+    @staticmethod
+    def _extract_publication_date(article_data: Dict[str, Any]) -> str:
         """
         Extract publication date from article data.
         
@@ -186,43 +306,66 @@ class PaperProcessor:
             logger.debug(f"Error extracting publication date: {str(e)}")
             return "Unknown"
     
-    def generate_csv(self, processed_papers: List[Dict[str, Any]]) -> str:
+    def generate_csv(
+        self, processed_papers: List[Dict[str, Any]], out: Optional[TextIO] = None
+    ) -> Optional[str]:
         """
         Generate CSV content from processed papers.
         
         Args:
             processed_papers: List of processed paper data
+            out: Optional text stream to write the CSV to directly
             
         Returns:
-            CSV content as a string
-        """
-        if not processed_papers:
-            return "No papers with non-academic affiliations found."
-        
-        # Define CSV columns
-        fieldnames = [
-            "PubmedID", 
-            "Title", 
-            "Publication Date", 
-            "Non-academic Author(s)", 
-            "Company Affiliation(s)", 
-            "Corresponding Author Email"
-        ]
+            CSV content as a string, or None if it was written to out
+        """
+        if out is None:
+            # Create CSV in memory
+            output = io.StringIO()
+            self.write_csv(processed_papers, output)
+            return output.getvalue()
+        
+        self.write_csv(processed_papers, out)
+        return None
+    
+    def write_csv(self, papers: Iterable[Dict[str, Any]], out: TextIO) -> int:
+        """
+        Write processed papers to a text stream as CSV, one row at a time.
+        
+        Args:
+            papers: Processed paper data, e.g. from iter_papers
+            out: Text stream to write the CSV to
+            
+        Returns:
+            Number of papers written
+        """
+        papers = iter(papers)
+        first_paper = next(papers, None)
+        if first_paper is None:
+            out.write("No papers with non-academic affiliations found.\n")
+            return 0
         
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
+        # Header names never need quoting
+        out.write(",".join(CSV_FIELDNAMES) + CSV_LINE_TERMINATOR)
+        writer = csv.writer(out, lineterminator=CSV_LINE_TERMINATOR)
         
         # Write data rows
-        for paper in processed_papers:
-            writer.writerow({
-                "PubmedID": paper["PubmedID"],
-                "Title": paper["Title"],
-                "Publication Date": paper["Publication Date"],
-                "Non-academic Author(s)": paper["non_academic_authors"],
-                "Company Affiliation(s)": paper["company_affiliations"],
-                "Corresponding Author Email": paper["corresponding_email"]
-            })
-        
-        return output.getvalue()
\ No newline at end of file
+        count = 0
+        for paper in itertools.chain((first_paper,), papers):
+            count += 1
+            row = (
+                str(paper["PubmedID"]),
+                str(paper["Title"]),
+                str(paper["Publication Date"]),
+                str(paper["non_academic_authors"]),
+                str(paper["company_affiliations"]),
+                str(paper["corresponding_email"])
+            )
+            
+            # Most rows need no quoting and are written directly; the csv module handles the rest
+            if any(map(_CSV_NEEDS_QUOTING.search, row)):
+                writer.writerow(row)
+            else:
+                out.write(f"{row[0]},{row[1]},{row[2]},{row[3]},{row[4]},{row[5]}{CSV_LINE_TERMINATOR}")
+        
+        return count
@@ -2,23 +2,244 @@
 Module for interacting with the PubMed API to fetch research papers.
 """
 
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Any, Tuple
+from functools import lru_cache
+import asyncio
+import os
+import tempfile
+import threading
 import time
 import re
 import logging
-from urllib.parse import quote
 
-import requests
+import aiohttp
 from Bio import Entrez
+from lxml import etree
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Maximum number of PMIDs sent in a single efetch request (NCBI recommendation)
+EFETCH_BATCH_SIZE = 200
+
+EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+
+# Retries for an efetch request rejected with 429/5xx or lost to a connection error;
+# the delay before retry n is EFETCH_RETRY_BACKOFF * 2 ** n seconds
+EFETCH_MAX_RETRIES = 3
+EFETCH_RETRY_BACKOFF = 1.0
+
+# Largest retmax NCBI accepts for a single esearch request; bigger searches page
+# through the Entrez history server
+ESEARCH_MAX_RETMAX = 10000
+
+# PubMed esearch only returns the first 10,000 PMIDs of a search; a retstart
+# past that comes back as an error, even through the history server
+ESEARCH_MAX_RESULTS = 10000
+
+# How long cached efetch records stay valid, in seconds
+CACHE_EXPIRE_AFTER = 24 * 60 * 60
+
+# Keywords that indicate academic institutions
+ACADEMIC_KEYWORDS = [
+    "university", "college", "institute", "school", "academy", 
+    "hospital", "clinic", "medical center", "health center",
+    "laboratory", "national", "federal", "ministry", "department of",
+    "center for", "research center", "foundation", "association"
+]
+
+# Keywords that indicate pharmaceutical/biotech companies
+COMPANY_KEYWORDS = [
+    "pharma", "biotech", "therapeutics", "biosciences", "inc", "llc", 
+    "ltd", "limited", "corp", "corporation", "co.", "company", "gmbh",
+    "laboratories", "labs", "biopharma", "pharmaceuticals"
+]
+
+# Each keyword list is compiled into a single pattern so an affiliation is scanned in one pass
+_ACADEMIC_RE = re.compile("|".join(map(re.escape, ACADEMIC_KEYWORDS)), re.IGNORECASE)
+_COMPANY_RE = re.compile("|".join(map(re.escape, COMPANY_KEYWORDS)), re.IGNORECASE)
+
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+
+# "Co." needs its dot, since a bare "CO" is the Colorado state code, e.g. "Array BioPharma, CO, USA"
+_CORPORATE_SUFFIX_RE = re.compile(r"(?:(?:inc|ltd|llc|corp|gmbh|plc|ag)\.?|co\.)$", re.IGNORECASE)
+
+# Size of the chunks fed to the XML parser while streaming efetch responses
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+def require_no_running_loop(caller: str) -> None:
+    """
+    Fail clearly when a synchronous fetch is made from inside a running event loop.
+    
+    The synchronous entry points drive their own loop with asyncio.run, which
+    cannot be nested (e.g. in Jupyter or an async application); such callers
+    should await PubMedAPI.fetch_batches_async instead.
+    
+    Args:
+        caller: Name of the synchronous method, for the error message
+        
+    Raises:
+        RuntimeError: If an event loop is running in this thread
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    raise RuntimeError(
+        f"{caller} cannot be called from a running event loop; "
+        f"await PubMedAPI.fetch_batches_async instead"
+    )
+
+def _text(elem: Optional[etree._Element]) -> str:
+    """Return the full text of an element, including text inside inline markup."""
+    return "".join(elem.itertext()) if elem is not None else ""
+
+def _title(article: etree._Element) -> str:
+    """Extract the article title from a PubmedArticle element."""
+    return _text(article.find("MedlineCitation/Article/ArticleTitle")) or "Unknown Title"
+
+def _pub_date(article: etree._Element) -> Dict[str, str]:
+    """Extract the PubDate fields (Year, Month, Day or MedlineDate) from a PubmedArticle element."""
+    pub_date = article.find("MedlineCitation/Article/Journal/JournalIssue/PubDate")
+    if pub_date is None:
+        return {}
+    return {child.tag: child.text for child in pub_date if child.text}
+
+def _authors(article: etree._Element) -> List[Dict[str, Any]]:
+    """Extract author names and affiliations from a PubmedArticle element."""
+    authors = []
+    for author_el in article.iterfind("MedlineCitation/Article/AuthorList/Author"):
+        author: Dict[str, Any] = {}
+        for tag in ("LastName", "ForeName", "Initials", "CollectiveName"):
+            value = author_el.findtext(tag)
+            if value:
+                author[tag] = value
+        
+        affiliations = [
+            {"Affiliation": _text(affiliation)}
+            for affiliation in author_el.iterfind("AffiliationInfo/Affiliation")
+        ]
+        if affiliations:
+            author["AffiliationInfo"] = affiliations
+        authors.append(author)
+    return authors
+
+def _email(article: etree._Element) -> Optional[str]:
+    """Find the first email address in the Affiliation elements of a PubmedArticle element."""
+    for affiliation in article.iter("Affiliation"):
+        email_match = _EMAIL_RE.search(_text(affiliation))
+        if email_match:
+            return email_match.group(0)
+    return None
+
+def _article_record(article: etree._Element) -> Dict[str, Any]:
+    """
+    Build a lightweight paper record from a PubmedArticle element.
+    
+    Only the fields used downstream are extracted, laid out the same way as
+    the corresponding parts of a Bio.Entrez record. The corresponding email
+    is looked up while the element is at hand and stored under
+    "CorrespondingEmail".
+    """
+    return {
+        "CorrespondingEmail": _email(article),
+        "MedlineCitation": {
+            "PMID": article.findtext("MedlineCitation/PMID"),
+            "Article": {
+                "ArticleTitle": _title(article),
+                "Journal": {"JournalIssue": {"PubDate": _pub_date(article)}},
+                "AuthorList": _authors(article)
+            }
+        }
+    }
+
+def _is_retryable(error: Exception) -> bool:
+    """Check whether a failed efetch request is worth retrying (rate limiting, server or connection errors)."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+def _read_articles(
+    events: Iterable[Tuple[str, etree._Element]],
+    on_article: Optional[Callable[[etree._Element], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Convert parser events for PubmedArticle elements into paper records.
+    
+    Each element is released once converted so memory stays bounded by a
+    single record rather than the whole response. If given, on_article is
+    called with each element before it is released.
+    """
+    records = []
+    for _, article in events:
+        records.append(_article_record(article))
+        if on_article is not None:
+            on_article(article)
+        article.clear()
+        while article.getprevious() is not None:
+            del article.getparent()[0]
+    return records
+
+class _RateLimiter:
+    """
+    Request spacer shared by every request a PubMedAPI client makes.
+    
+    Requests are spaced time_period / max_rate seconds apart from the very
+    first one, so no one-second window ever holds more than max_rate requests;
+    a bucket that starts full would let a burst through on top of the steady rate.
+    Unlike aiolimiter's AsyncLimiter it is not bound to an event loop, so a
+    single spacer covers synchronous esearch calls (used with "with") and
+    efetch requests from any number of asyncio.run calls (used with "async with").
+    """
+    
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            max_rate: Requests allowed per time_period
+            time_period: Length of the period in seconds
+        """
+        self.max_rate = max_rate
+        self._interval = time_period / max_rate
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """
+        Claim the next free send slot.
+        
+        Returns:
+            Seconds to wait before the request may be sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+            return slot - now
+    
+    def __enter__(self) -> None:
+        time.sleep(self._reserve())
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+    
+    async def __aenter__(self) -> None:
+        await asyncio.sleep(self._reserve())
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
 class PubMedAPI:
     """Class to interact with the PubMed API using Biopython's Entrez module."""
     
-    def __init__(self, email: str, api_key: Optional[str] = None, tool: str = "PubMedPaperFetcher"):
+    def __init__(
+        self,
+        email: str,
+        api_key: Optional[str] = None,
+        tool: str = "PubMedPaperFetcher",
+        cache_dir: Optional[str] = None,
+        cache_expire_after: int = CACHE_EXPIRE_AFTER
+    ):
         """
         Initialize the PubMed API client.
         
@@ -26,34 +247,32 @@ class PubMedAPI:
             email: Email address to identify yourself to NCBI
             api_key: Optional NCBI API key for higher request limits
             tool: Name of the tool making the request
+            cache_dir: Optional directory in which to cache raw efetch XML per PMID
+            cache_expire_after: Seconds after which a cached record is fetched again
         """
         self.email = email
         self.api_key = api_key
         self.tool = tool
+        self.cache_dir = cache_dir
+        self.cache_expire_after = cache_expire_after
+        
+        # One bucket for every esearch and efetch request (NCBI allows 10 per second
+        # with an API key, 3 without)
+        self._limiter = _RateLimiter(10 if api_key else 3)
+        
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError as e:
+                # An unusable cache (e.g. a read-only home directory) should not stop a search
+                logger.warning(f"Caching disabled, could not create {cache_dir}: {str(e)}")
+                self.cache_dir = None
         
         # Set up Entrez
         Entrez.email = email
         Entrez.tool = tool
         if api_key:
             Entrez.api_key = api_key
-            
-        # Rate limiting parameters
-        self.request_delay = 0.34  # seconds between requests (3 requests per second with API key)
-        if not api_key:
-            self.request_delay = 1.0  # 1 request per second without API key
-            
-        self.last_request_time = 0.0
-    
-    def _rate_limit(self) -> None:
-        """Implement rate limiting for API requests."""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        
-        if time_since_last_request < self.request_delay:
-            sleep_time = self.request_delay - time_since_last_request
-            time.sleep(sleep_time)
-            
-        self.last_request_time = time.time()
     
     def search_papers(self, query: str, max_results: int = 100) -> List[str]:
         """
@@ -67,15 +286,15 @@ class PubMedAPI:
             List of PubMed IDs matching the query
         """
         logger.info(f"Searching PubMed with query: {query}")
-        self._rate_limit()
         
         try:
-            # Search for papers
-            handle = Entrez.esearch(db="pubmed", term=query, retmax=max_results)
-            record = Entrez.read(handle)
-            handle.close()
+            # Search for papers; esearch shares the client's rate limiter with efetch
+            if max_results <= ESEARCH_MAX_RETMAX:
+                record = self._esearch(term=query, retmax=max_results)
+                pmids = record["IdList"]
+            else:
+                pmids = self._search_with_history(query, max_results)
             
-            pmids = record["IdList"]
             logger.info(f"Found {len(pmids)} papers matching the query")
             return pmids
         
@@ -83,35 +302,300 @@ class PubMedAPI:
             logger.error(f"Error searching PubMed: {str(e)}")
             raise
     
-    def fetch_paper_details(self, pmid: str) -> Dict[str, Any]:
+    def _esearch(self, **params: Any) -> Dict[str, Any]:
+        """
+        Run a single PubMed esearch request and parse its result.
+        
+        Args:
+            **params: esearch parameters other than db
+            
+        Returns:
+            Parsed esearch record
+        """
+        with self._limiter:
+            handle = Entrez.esearch(db="pubmed", **params)
+        try:
+            return Entrez.read(handle)
+        finally:
+            handle.close()
+    
+    def _search_with_history(self, query: str, max_results: int) -> List[str]:
+        """
+        Page through a large search stored on the Entrez history server.
+        
+        The query is sent once; later pages only reference its WebEnv and
+        query_key, and no page asks for more than ESEARCH_MAX_RETMAX PMIDs.
+        PubMed stops at ESEARCH_MAX_RESULTS PMIDs, so larger searches are cut
+        off there with a warning.
+        
+        Args:
+            query: PubMed search query
+            max_results: Maximum number of results to return
+            
+        Returns:
+            List of PubMed IDs matching the query
+        """
+        record = self._esearch(term=query, retmax=ESEARCH_MAX_RETMAX, usehistory="y")
+        pmids = list(record["IdList"])
+        count = int(record["Count"])
+        total = min(count, max_results)
+        if total > ESEARCH_MAX_RESULTS:
+            logger.warning(
+                f"PubMed only returns the first {ESEARCH_MAX_RESULTS} of {count} matching papers; "
+                f"narrow the query to see the rest"
+            )
+            total = ESEARCH_MAX_RESULTS
+        
+        while len(pmids) < total:
+            page = self._esearch(
+                webenv=record["WebEnv"],
+                query_key=record["QueryKey"],
+                retstart=len(pmids),
+                retmax=min(ESEARCH_MAX_RETMAX, total - len(pmids))
+            )
+            if not page["IdList"]:
+                break
+            pmids.extend(page["IdList"])
+        
+        return pmids[:max_results]
+    
+    def fetch_paper_details(
+        self,
+        pmid: str,
+        *,
+        parsed: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Fetch detailed information for a specific paper by PubMed ID.
         
         Args:
             pmid: PubMed ID of the paper
+            parsed: Record already parsed for this PMID, e.g. from a batched
+                efetch; it is returned as-is without another request
             
         Returns:
             Dictionary containing paper details
         """
-        logger.debug(f"Fetching details for paper with PMID: {pmid}")
-        self._rate_limit()
+        if parsed is not None:
+            return parsed
+        
+        return self.fetch_paper_details_batch([pmid])[0]
+    
+    def fetch_paper_details_batch(self, pmids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch detailed information for several papers with a single efetch request.
         
+        Args:
+            pmids: PubMed IDs of the papers (at most EFETCH_BATCH_SIZE)
+            
+        Returns:
+            List of paper details in the same order as pmids, with an empty
+            dictionary for any PMID that could not be fetched
+            
+        Raises:
+            RuntimeError: If called from a running event loop
+        """
+        require_no_running_loop("fetch_paper_details_batch")
+        return asyncio.run(self.fetch_batches_async([pmids]))[0]
+    
+    async def fetch_batches_async(self, pmid_batches: List[List[str]]) -> List[List[Dict[str, Any]]]:
+        """
+        Fetch several batches of papers concurrently.
+        
+        Requests start as soon as the client's NCBI rate limit allows (10 per
+        second with an API key, 3 without), so network I/O overlaps instead of
+        waiting for each batch in turn.
+        
+        Args:
+            pmid_batches: Batches of PubMed IDs (each at most EFETCH_BATCH_SIZE)
+            
+        Returns:
+            List of paper details for each batch, in the same order as pmid_batches
+        """
+        async with aiohttp.ClientSession() as session:
+            return list(await asyncio.gather(
+                *(self._fetch_batch_async(session, batch) for batch in pmid_batches)
+            ))
+    
+    async def _fetch_batch_async(
+        self, session: aiohttp.ClientSession, pmids: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch a single batch of papers with a direct efetch request.
+        
+        Requests rejected with 429 or a 5xx status, or lost to a connection
+        error, are retried up to EFETCH_MAX_RETRIES times with exponential backoff.
+        
+        Args:
+            session: Open aiohttp session
+            pmids: PubMed IDs of the papers
+            
+        Returns:
+            List of paper details in the same order as pmids
+        """
+        cached, missing = self._load_cached(pmids)
+        if not missing:
+            return self._align_records(pmids, cached)
+        
+        logger.debug(f"Fetching details for {len(missing)} papers")
+        attempt = 0
+        
+        while True:
+            try:
+                articles = await self._stream_efetch(session, missing)
+                return self._align_records(pmids, cached + articles)
+            
+            except Exception as e:
+                if attempt < EFETCH_MAX_RETRIES and _is_retryable(e):
+                    delay = EFETCH_RETRY_BACKOFF * 2 ** attempt
+                    attempt += 1
+                    logger.warning(f"Retrying efetch for {len(missing)} papers in {delay:g}s after error: {str(e)}")
+                    await asyncio.sleep(delay)
+                    continue
+                
+                logger.error(f"Error fetching paper details for PMIDs {', '.join(missing)}: {str(e)}")
+                # Papers already read from the cache are still returned
+                return self._align_records(pmids, cached)
+    
+    async def _stream_efetch(
+        self, session: aiohttp.ClientSession, pmids: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Send one efetch request and parse the response as it streams in.
+        
+        Args:
+            session: Open aiohttp session
+            pmids: PubMed IDs of the papers
+            
+        Returns:
+            Paper records in response order; PMIDs unknown to PubMed are missing
+        """
+        parser = etree.XMLPullParser(events=("end",), tag="PubmedArticle")
+        on_article = self._store_cached if self.cache_dir else None
+        articles = []
+        
+        async with self._limiter:
+            async with session.get(EFETCH_URL, params=self._efetch_params(pmids)) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(_STREAM_CHUNK_SIZE):
+                    parser.feed(chunk)
+                    articles.extend(_read_articles(parser.read_events(), on_article))
+        
+        parser.close()
+        articles.extend(_read_articles(parser.read_events(), on_article))
+        return articles
+    
+    def _load_cached(self, pmids: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Load paper records for the given PMIDs from the on-disk cache.
+        
+        A PMID requested more than once is only loaded or fetched once;
+        _align_records hands the record back at every position.
+        
+        Args:
+            pmids: PubMed IDs of the papers
+            
+        Returns:
+            Tuple of (records found in the cache, PMIDs that still need fetching)
+        """
+        unique_pmids = list(dict.fromkeys(pmids))
+        if not self.cache_dir:
+            return [], unique_pmids
+        
+        cached = []
+        missing = []
+        now = time.time()
+        
+        for pmid in unique_pmids:
+            path = os.path.join(self.cache_dir, f"{pmid}.xml")
+            try:
+                if now - os.path.getmtime(path) < self.cache_expire_after:
+                    with open(path, "rb") as f:
+                        cached.append(_article_record(etree.fromstring(f.read())))
+                    continue
+            except FileNotFoundError:
+                pass
+            except (OSError, etree.XMLSyntaxError) as e:
+                logger.debug(f"Ignoring unreadable cache entry for PMID {pmid}: {str(e)}")
+            missing.append(pmid)
+        
+        if cached:
+            logger.debug(f"Loaded {len(cached)} papers from the cache")
+        return cached, missing
+    
+    def _store_cached(self, article: etree._Element) -> None:
+        """
+        Store the raw XML of a PubmedArticle element in the on-disk cache.
+        
+        Args:
+            article: PubmedArticle element parsed from an efetch response
+        """
+        pmid = article.findtext("MedlineCitation/PMID")
+        if not pmid or not pmid.isdigit():
+            return
+        
+        tmp_path = None
         try:
-            # Fetch paper details
-            handle = Entrez.efetch(db="pubmed", id=pmid, retmode="xml")
-            records = Entrez.read(handle)
-            handle.close()
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(etree.tostring(article))
+            os.replace(tmp_path, os.path.join(self.cache_dir, f"{pmid}.xml"))
+        except OSError as e:
+            logger.debug(f"Could not cache PMID {pmid}: {str(e)}")
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+    
+    def _efetch_params(self, pmids: List[str]) -> Dict[str, str]:
+        """
+        Build the query parameters for an efetch request.
+        
+        Args:
+            pmids: PubMed IDs of the papers
             
-            if not records["PubmedArticle"]:
-                logger.warning(f"No details found for PMID: {pmid}")
-                return {}
+        Returns:
+            Dictionary of efetch query parameters
+        """
+        params = {
+            "db": "pubmed",
+            "id": ",".join(pmids),
+            "retmode": "xml",
+            "email": self.email,
+            "tool": self.tool
+        }
+        if self.api_key:
+            params["api_key"] = self.api_key
+        return params
+    
+    def _align_records(self, pmids: List[str], articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Match efetch records to the requested PMIDs.
+        
+        efetch silently drops unknown PMIDs, so records are matched by ID
+        rather than by position.
+        
+        Args:
+            pmids: Requested PubMed IDs
+            articles: Paper records parsed from the efetch response
             
-            article = records["PubmedArticle"][0]
-            return article
+        Returns:
+            List of paper details in the same order as pmids, with an empty
+            dictionary for any PMID that was not returned
+        """
+        articles_by_pmid = {
+            str(article["MedlineCitation"]["PMID"]): article
+            for article in articles
+        }
         
-        except Exception as e:
-            logger.error(f"Error fetching paper details for PMID {pmid}: {str(e)}")
-            return {}
+        results = []
+        for pmid in pmids:
+            if pmid not in articles_by_pmid:
+                logger.warning(f"No details found for PMID: {pmid}")
+            results.append(articles_by_pmid.get(pmid, {}))
+        return results
     
     def is_non_academic_affiliation(self, affiliation: str) -> Tuple[bool, Optional[str]]:
         """
@@ -123,44 +607,37 @@ class PubMedAPI:
         Returns:
             Tuple of (is_non_academic, company_name)
         """
-        # Keywords that indicate academic institutions
-        academic_keywords = [
-            "university", "college", "institute", "school", "academy", 
-            "hospital", "clinic", "medical center", "health center",
-            "laboratory", "national", "federal", "ministry", "department of",
-            "center for", "research center", "foundation", "association"
-        ]
+        return self._classify_affiliation(affiliation)
+    
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _classify_affiliation(affiliation: str) -> Tuple[bool, Optional[str]]:
+        """
+        Classify an affiliation, caching the result per distinct affiliation string.
         
-        # Keywords that indicate pharmaceutical/biotech companies
-        company_keywords = [
-            "pharma", "biotech", "therapeutics", "biosciences", "inc", "llc", 
-            "ltd", "limited", "corp", "corporation", "co.", "company", "gmbh",
-            "laboratories", "labs", "biopharma", "pharmaceuticals"
-        ]
+        The cache is keyed on the original string rather than a lowercased one
+        because the extracted company name keeps its original casing; the
+        keyword patterns are case-insensitive, so no lowercasing is needed.
+        
+        Args:
+            affiliation: Author affiliation string
+            
+        Returns:
+            Tuple of (is_non_academic, company_name)
+        """
+        # Academic institutions are never classified as companies, even with a company-like name
+        if _ACADEMIC_RE.search(affiliation):
+            return False, None
         
-        # Check if affiliation contains company indicators but not academic indicators
-        affiliation_lower = affiliation.lower()
-        
-        # First check for obvious company indicators
-        for keyword in company_keywords:
-            if keyword in affiliation_lower:
-                # Make sure it's not an academic institution with a similar name
-                is_academic = any(academic_kw in affiliation_lower for academic_kw in academic_keywords)
-                if not is_academic:
-                    # Try to extract company name
-                    company_name = self._extract_company_name(affiliation)
-                    return True, company_name
-        
-        # Check for absence of academic keywords as another indicator
-        if not any(keyword in affiliation_lower for keyword in academic_keywords):
-            # If no academic keywords and has "," which often separates company from location
-            if "," in affiliation:
-                company_name = self._extract_company_name(affiliation)
-                return True, company_name
+        # Company indicators, or a "," which often separates company from location
+        if _COMPANY_RE.search(affiliation) or "," in affiliation:
+            company_name = PubMedAPI._extract_company_name(affiliation)
+            return True, company_name
         
         return False, None
     
-    def _extract_company_name(self, affiliation: str) -> str:
+    @staticmethod
+    def _extract_company_name(affiliation: str) -> str:
         """
         Extract company name from affiliation string.
         
@@ -172,14 +649,21 @@ class PubMedAPI:
         """
         # Try to extract company name before the first comma
         if "," in affiliation:
-            potential_company = affiliation.split(",")[0].strip()
+            parts = affiliation.split(",")
+            potential_company = parts[0].strip()
+            
+            # Keep a legal suffix written after a comma, e.g. "Genentech, Inc."
+            if len(parts) > 1 and _CORPORATE_SUFFIX_RE.match(parts[1].strip()):
+                potential_company = f"{potential_company}, {parts[1].strip()}"
+            
             if len(potential_company) > 3 and len(potential_company) < 50:
                 return potential_company
         
         # If no comma or extraction failed, return the first 50 chars
         return affiliation[:50].strip()
     
-    def extract_corresponding_email(self, article: Dict[str, Any]) -> Optional[str]:
+    @staticmethod
+    def extract_corresponding_email(article: Dict[str, Any]) -> Optional[str]:
         """
         Extract the corresponding author's email from the article data.
         
@@ -189,27 +673,19 @@ class PubMedAPI:
         Returns:
             Email address of the corresponding author, if available
         """
+        # Records parsed from efetch already carry the email found in their Affiliation elements
+        if "CorrespondingEmail" in article:
+            return article["CorrespondingEmail"]
+        
         try:
-            # Try to find email in the author list
-            if "MedlineCitation" in article and "Article" in article["MedlineCitation"]:
-                article_data = article["MedlineCitation"]["Article"]
-                
-                # Check if author list exists
-                if "AuthorList" in article_data:
-                    for author in article_data["AuthorList"]:
-                        if "AffiliationInfo" in author:
-                            for affiliation in author["AffiliationInfo"]:
-                                if "Affiliation" in affiliation:
-                                    # Look for email pattern in affiliation
-                                    email_match = re.search(r'[\w.+-]+@[\w-]+\.[\w.-]+', affiliation["Affiliation"])
-                                    if email_match:
-                                        return email_match.group(0)
-            
-            # Try to find in the article data
-            article_str = str(article)
-            email_matches = re.findall(r'[\w.+-]+@[\w-]+\.[\w.-]+', article_str)
-            if email_matches:
-                return email_matches[0]
+            # Look for an email address in the author affiliations, where PubMed records them
+            article_data = article.get("MedlineCitation", {}).get("Article", {})
+            
+            for author in article_data.get("AuthorList", []):
+                for affiliation in author.get("AffiliationInfo", []):
+                    email_match = _EMAIL_RE.search(affiliation.get("Affiliation", ""))
+                    if email_match:
+                        return email_match.group(0)
                 
         except Exception as e:
             logger.debug(f"Error extracting email: {str(e)}")
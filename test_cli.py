@@ -3,11 +3,14 @@ Tests for the command-line interface.
 """
 
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, ANY, MagicMock
+import gzip
 import io
+import os
 import sys
+import tempfile
 
-from pubmed_paper_fetcher.cli import main, parse_args
+from pubmed_paper_fetcher.cli import main, parse_args, default_cache_dir
 
 class TestCLI(unittest.TestCase):
     """Test cases for the command-line interface."""
@@ -21,6 +24,14 @@ class TestCLI(unittest.TestCase):
         self.assertEqual(args.max_results, 100)
         self.assertEqual(args.email, "user@example.com")
         self.assertIsNone(args.api_key)
+        self.assertEqual(args.cache_dir, default_cache_dir())
+        self.assertFalse(args.no_cache)
+    
+    def test_parse_args_cache_dir_from_environment(self):
+        """Test that PUBMED_CACHE_DIR is read when arguments are parsed."""
+        with patch.dict(os.environ, {"PUBMED_CACHE_DIR": "/tmp/pubmed-env-cache"}):
+            args = parse_args(["cancer therapy"])
+        self.assertEqual(args.cache_dir, "/tmp/pubmed-env-cache")
     
     def test_parse_args_full(self):
         """Test parsing all arguments."""
@@ -30,7 +41,9 @@ class TestCLI(unittest.TestCase):
             "--file", "output.csv",
             "--max-results", "50",
             "--email", "test@example.com",
-            "--api-key", "abc123"
+            "--api-key", "abc123",
+            "--cache-dir", "/tmp/pubmed-cache",
+            "--no-cache"
         ])
         self.assertEqual(args.query, "cancer therapy")
         self.assertTrue(args.debug)
@@ -38,6 +51,8 @@ class TestCLI(unittest.TestCase):
         self.assertEqual(args.max_results, 50)
         self.assertEqual(args.email, "test@example.com")
         self.assertEqual(args.api_key, "abc123")
+        self.assertEqual(args.cache_dir, "/tmp/pubmed-cache")
+        self.assertTrue(args.no_cache)
     
     @patch('pubmed_paper_fetcher.cli.PubMedAPI')
     @patch('pubmed_paper_fetcher.cli.PaperProcessor')
@@ -52,7 +67,7 @@ class TestCLI(unittest.TestCase):
         mock_processor_class.return_value = mock_processor
         
         # Mock processor methods
-        mock_processor.process_papers.return_value = [
+        mock_processor.iter_papers.return_value = iter([
             {
                 "PubmedID": "12345",
                 "Title": "Test Paper",
@@ -61,9 +76,13 @@ class TestCLI(unittest.TestCase):
                 "company_affiliations": "Pfizer Inc.",
                 "corresponding_email": "john.smith@pfizer.com"
             }
-        ]
+        ])
+        
+        def write_csv(papers, out):
+            out.write("CSV content")
+            return len(list(papers))
         
-        mock_processor.generate_csv.return_value = "CSV content"
+        mock_processor.write_csv.side_effect = write_csv
         
         # Call main function
         result = main(["cancer therapy"])
@@ -75,18 +94,19 @@ class TestCLI(unittest.TestCase):
         mock_api_class.assert_called_once_with(
             email="user@example.com",
             api_key=None,
-            tool="get-papers-list"
+            tool="get-papers-list",
+            cache_dir=default_cache_dir()
         )
         
         mock_processor_class.assert_called_once_with(mock_api, debug=False)
         
         # Verify processor methods were called correctly
-        mock_processor.process_papers.assert_called_once_with(
+        mock_processor.iter_papers.assert_called_once_with(
             query="cancer therapy",
             max_results=100
         )
         
-        mock_processor.generate_csv.assert_called_once()
+        mock_processor.write_csv.assert_called_once()
         
         # Verify output
         self.assertEqual(mock_stdout.getvalue().strip(), "CSV content")
@@ -103,7 +123,7 @@ class TestCLI(unittest.TestCase):
         mock_processor_class.return_value = mock_processor
         
         # Mock processor methods
-        mock_processor.process_papers.return_value = [
+        mock_processor.iter_papers.return_value = iter([
             {
                 "PubmedID": "12345",
                 "Title": "Test Paper",
@@ -112,25 +132,78 @@ class TestCLI(unittest.TestCase):
                 "company_affiliations": "Pfizer Inc.",
                 "corresponding_email": "john.smith@pfizer.com"
             }
-        ]
+        ])
         
-        mock_processor.generate_csv.return_value = "CSV content"
+        def write_csv(papers, out):
+            out.write("CSV content")
+            return len(list(papers))
         
-        # Mock open function
-        mock_open = MagicMock()
-        mock_file = MagicMock()
-        mock_open.return_value.__enter__.return_value = mock_file
+        mock_processor.write_csv.side_effect = write_csv
         
-        with patch('builtins.open', mock_open):
+        with tempfile.TemporaryDirectory() as tmp_dir, patch('builtins.open', wraps=open) as mock_open:
+            path = os.path.join(tmp_dir, "output.csv")
+            
             # Call main function with file output
-            result = main(["cancer therapy", "--file", "output.csv"])
+            result = main(["cancer therapy", "--file", path])
             
             # Verify result
             self.assertEqual(result, 0)
             
-            # Verify file was opened and written to
-            mock_open.assert_called_once_with("output.csv", 'w', encoding='utf-8')
-            mock_file.write.assert_called_once_with("CSV content")
+            # Verify the file was opened buffered and the CSV was written straight to it
+            mock_open.assert_called_once_with(
+                ANY, 'w', encoding='utf-8', newline='', buffering=1024 * 1024
+            )
+            mock_processor.write_csv.assert_called_once_with(
+                mock_processor.iter_papers.return_value, ANY
+            )
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), "CSV content")
+            
+            # Verify the temporary file was moved into place
+            self.assertEqual(os.listdir(tmp_dir), ["output.csv"])
+    
+    @patch('pubmed_paper_fetcher.cli.PubMedAPI')
+    @patch('pubmed_paper_fetcher.cli.PaperProcessor')
+    def test_main_with_file_output_failure_keeps_previous_file(self, mock_processor_class, mock_api_class):
+        """Test that a failed run leaves an existing output file untouched."""
+        mock_processor = MagicMock()
+        mock_processor_class.return_value = mock_processor
+        
+        def write_csv(papers, out):
+            out.write("partial")
+            raise RuntimeError("efetch failed")
+        
+        mock_processor.write_csv.side_effect = write_csv
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "output.csv")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("previous results")
+            
+            result = main(["cancer therapy", "--file", path])
+            
+            # Verify the error was reported and the previous results survived
+            self.assertEqual(result, 1)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), "previous results")
+            self.assertEqual(os.listdir(tmp_dir), ["output.csv"])
+    
+    @patch('pubmed_paper_fetcher.cli.PubMedAPI')
+    @patch('pubmed_paper_fetcher.cli.PaperProcessor')
+    def test_main_with_gzip_output(self, mock_processor_class, mock_api_class):
+        """Test main function with gzip-compressed file output."""
+        mock_processor = MagicMock()
+        mock_processor_class.return_value = mock_processor
+        mock_processor.write_csv.side_effect = lambda papers, out: out.write("CSV content")
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "output.csv.gz")
+            result = main(["cancer therapy", "--file", path])
+            
+            # Verify the CSV was written compressed
+            self.assertEqual(result, 0)
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                self.assertEqual(f.read(), "CSV content")
     
     @patch('pubmed_paper_fetcher.cli.PubMedAPI')
     def test_main_error(self, mock_api_class):
@@ -2,62 +2,511 @@
 Tests for the PubMed API module.
 """
 
-import unittest
-from unittest.mock import patch, MagicMock
+import asyncio
+import io
+import logging
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
 
-from pubmed_paper_fetcher.pubmed_api import PubMedAPI
+import aiohttp
+import pytest
+from hypothesis import given, strategies as st
 
-class TestPubMedAPI(unittest.TestCase):
-    """Test cases for the PubMedAPI class."""
+from pubmed_paper_fetcher.pubmed_api import PubMedAPI, EFETCH_URL, _RateLimiter
+
+EFETCH_XML = b"""<?xml version="1.0" ?>
+<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2024//EN" "https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_240101.dtd">
+<PubmedArticleSet>
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID Version="1">67890</PMID>
+      <Article>
+        <Journal><JournalIssue><PubDate><MedlineDate>2020 Winter</MedlineDate></PubDate></JournalIssue></Journal>
+        <ArticleTitle>Second paper</ArticleTitle>
+      </Article>
+    </MedlineCitation>
+  </PubmedArticle>
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID Version="1">12345</PMID>
+      <Article>
+        <Journal><JournalIssue><PubDate><Year>2023</Year><Month>Jan</Month></PubDate></JournalIssue></Journal>
+        <ArticleTitle>Targeting <i>KRAS</i> in lung cancer</ArticleTitle>
+        <AuthorList>
+          <Author>
+            <LastName>Smith</LastName>
+            <ForeName>John</ForeName>
+            <Initials>J</Initials>
+            <AffiliationInfo>
+              <Affiliation>Pfizer Inc., New York, NY, USA. john.smith@pfizer.com</Affiliation>
+            </AffiliationInfo>
+          </Author>
+          <Author><CollectiveName>KRAS Study Group</CollectiveName></Author>
+        </AuthorList>
+      </Article>
+    </MedlineCitation>
+  </PubmedArticle>
+</PubmedArticleSet>
+"""
+
+class FakeResponse:
+    """Minimal stand-in for an aiohttp response streaming a fixed body."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.api = PubMedAPI(email="test@example.com")
+    def __init__(self, body, status=200):
+        self.body = body
+        self.status = status
+        self.content = self
     
-    def test_is_non_academic_affiliation_company(self):
-        """Test identification of company affiliations."""
-        # Test obvious company affiliations
-        affiliation = "Pfizer Inc., New York, NY, USA"
-        is_company, company_name = self.api.is_non_academic_affiliation(affiliation)
-        self.assertTrue(is_company)
-        self.assertEqual(company_name, "Pfizer Inc.")
-        
-        affiliation = "Genentech, Inc., South San Francisco, CA 94080, USA"
-        is_company, company_name = self.api.is_non_academic_affiliation(affiliation)
-        self.assertTrue(is_company)
-        self.assertEqual(company_name, "Genentech, Inc.")
-    
-    def test_is_non_academic_affiliation_academic(self):
-        """Test identification of academic affiliations."""
-        # Test obvious academic affiliations
-        affiliation = "Department of Biology, Stanford University, Stanford, CA, USA"
-        is_company, company_name = self.api.is_non_academic_affiliation(affiliation)
-        self.assertFalse(is_company)
-        self.assertIsNone(company_name)
+    def raise_for_status(self):
+        if self.status >= 400:
+            request_info = SimpleNamespace(real_url=EFETCH_URL)
+            raise aiohttp.ClientResponseError(request_info, (), status=self.status)
+    
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
+class FakeSession:
+    """Minimal stand-in for an aiohttp session that records request parameters."""
+    
+    def __init__(self, body, error=None, statuses=()):
+        self.body = body
+        self.error = error
+        self.statuses = list(statuses)
+        self.requests = []
+    
+    def get(self, url, params):
+        self.requests.append(params)
+        if self.error is not None:
+            raise self.error
+        return FakeResponse(self.body, self.statuses.pop(0) if self.statuses else 200)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
+@pytest.fixture(scope="module")
+def api():
+    """PubMedAPI client shared by the tests in this module; it holds no per-test state."""
+    client = PubMedAPI(email="test@example.com")
+    # Tests share the client, so lift the NCBI rate limit to keep them from waiting on each other
+    client._limiter = _RateLimiter(1000)
+    # HTTP sessions are opened per fetch call, so there is no connection pool to close
+    yield client
+
+@pytest.mark.parametrize("affiliation,expected_company,expected_name", [
+    ("Pfizer Inc., New York, NY, USA", True, "Pfizer Inc."),
+    ("Genentech, Inc., South San Francisco, CA 94080, USA", True, "Genentech, Inc."),
+    ("Department of Biology, Stanford University, Stanford, CA, USA", False, None),
+    ("Harvard Medical School, Boston, MA, USA", False, None)
+])
+def test_is_non_academic_affiliation(api, affiliation, expected_company, expected_name):
+    """Test identification of company and academic affiliations."""
+    assert api.is_non_academic_affiliation(affiliation) == (expected_company, expected_name)
+
+@pytest.mark.parametrize("affiliation,expected", [
+    ("Genentech, Inc., South San Francisco, CA 94080, USA", "Genentech, Inc."),
+    ("Roche Diagnostics, GmbH, Mannheim, Germany", "Roche Diagnostics, GmbH"),
+    ("Acme Biologics, Co., Springfield, USA", "Acme Biologics, Co."),
+    ("Pfizer Inc., New York, NY, USA", "Pfizer Inc."),
+    ("Novartis AG, Basel, Switzerland", "Novartis AG"),
+    ("Acme, Incorporated Labs, Springfield", "Acme"),
+    ("Array BioPharma, CO, USA", "Array BioPharma"),
+    ("Amgen Boulder, Co, USA", "Amgen Boulder")
+])
+def test_extract_company_name_keeps_comma_separated_suffix(affiliation, expected):
+    """Test that a legal suffix written after a comma stays part of the company name."""
+    assert PubMedAPI._extract_company_name(affiliation) == expected
+
+def test_classifier_is_cached(api):
+    """Test that repeated affiliations are served from the classifier cache."""
+    api._classify_affiliation.cache_clear()
+    
+    api.is_non_academic_affiliation("Pfizer Inc., New York, NY, USA")
+    api.is_non_academic_affiliation("Pfizer Inc., New York, NY, USA")
+    
+    info = api._classify_affiliation.cache_info()
+    assert info.misses == 1
+    assert info.hits >= 1
+
+COMPANIES = st.sampled_from(["Pfizer Inc.", "Genentech, Inc.", "Moderna Inc.", "Novartis AG"])
+ACADEMICS = st.sampled_from([
+    "Stanford University",
+    "Harvard Medical School",
+    "Massachusetts Institute of Technology",
+    "University of Oxford"
+])
+LOCATIONS = st.sampled_from(["Cityville, USA", "New York, NY, USA", "Basel, Switzerland", "Cambridge, UK"])
+
+@given(company=COMPANIES, location=LOCATIONS)
+def test_is_non_academic_affiliation_company_property(api, company, location):
+    """Test that any company affiliation is flagged with the company's name."""
+    assert api.is_non_academic_affiliation(f"{company}, {location}") == (True, company)
+
+@given(academic=ACADEMICS, location=LOCATIONS)
+def test_is_non_academic_affiliation_academic_property(api, academic, location):
+    """Test that no academic affiliation is flagged."""
+    assert api.is_non_academic_affiliation(f"{academic}, {location}") == (False, None)
+
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_fetch_paper_details_batch_cached(mock_session_class):
+    """Test that fetched papers are served from the on-disk cache."""
+    session = FakeSession(EFETCH_XML)
+    mock_session_class.return_value = session
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        api = PubMedAPI(email="test@example.com", cache_dir=cache_dir)
+        first = api.fetch_paper_details_batch(["12345", "67890"])
+        second = api.fetch_paper_details_batch(["67890", "12345"])
+    
+    # Verify only the first call reached PubMed
+    assert len(session.requests) == 1
+    assert second == [first[1], first[0]]
+
+def test_align_records_duplicate_and_missing_pmids(api):
+    """Test that records are matched by PMID, repeated for duplicates and empty when missing."""
+    record = {"MedlineCitation": {"PMID": "12345"}}
+    other = {"MedlineCitation": {"PMID": "67890"}}
+    
+    result = api._align_records(["12345", "99999", "12345", "67890"], [other, record])
+    
+    assert result == [record, {}, record, other]
+    assert result[0] is result[2]
+
+@pytest.mark.parametrize("use_cache", [False, True])
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_fetch_paper_details_batch_duplicate_and_missing_pmids(mock_session_class, tmp_path, use_cache):
+    """Test that a duplicated PMID is fetched once and a missing PMID is neither returned nor cached."""
+    session = FakeSession(EFETCH_XML)
+    mock_session_class.return_value = session
+    api = PubMedAPI(email="test@example.com", cache_dir=str(tmp_path) if use_cache else None)
+    api._limiter = _RateLimiter(1000)
+    
+    first = api.fetch_paper_details_batch(["12345", "99999", "12345"])
+    
+    assert session.requests[0]["id"] == "12345,99999"
+    assert first[0]["MedlineCitation"]["PMID"] == "12345"
+    assert first[1] == {}
+    assert first[2] == first[0]
+    
+    # The missing PMID is asked for again; the duplicate comes from the cache when there is one
+    second = api.fetch_paper_details_batch(["12345", "99999", "12345"])
+    
+    assert session.requests[1]["id"] == ("99999" if use_cache else "12345,99999")
+    assert second == first
+    assert not (tmp_path / "99999.xml").exists()
+
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_fetch_paper_details_cached_until_expiry(mock_session_class, tmp_path):
+    """Test that a cached paper is reused within the TTL and refetched after it."""
+    session = FakeSession(EFETCH_XML)
+    mock_session_class.return_value = session
+    
+    api = PubMedAPI(email="test@example.com", cache_dir=str(tmp_path))
+    first = api.fetch_paper_details("12345")
+    second = api.fetch_paper_details("12345")
+    
+    # Verify the second call was served from the cache file
+    assert len(session.requests) == 1
+    assert (tmp_path / "12345.xml").is_file()
+    assert second == first
+    
+    # Verify an expired entry is fetched again
+    expired = PubMedAPI(email="test@example.com", cache_dir=str(tmp_path), cache_expire_after=0)
+    assert expired.fetch_paper_details("12345") == first
+    assert len(session.requests) == 2
+
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_failed_cache_write_leaves_no_temporary_file(mock_session_class, tmp_path):
+    """Test that a cache entry that cannot be moved into place is cleaned up."""
+    mock_session_class.return_value = FakeSession(EFETCH_XML)
+    api = PubMedAPI(email="test@example.com", cache_dir=str(tmp_path))
+    
+    with patch('pubmed_paper_fetcher.pubmed_api.os.replace', side_effect=OSError("disk full")):
+        result = api.fetch_paper_details("12345")
+    
+    # Verify the paper is still returned and nothing is left in the cache directory
+    assert result["MedlineCitation"]["PMID"] == "12345"
+    assert list(tmp_path.iterdir()) == []
+
+def test_unusable_cache_dir_disables_cache(tmp_path):
+    """Test that a cache directory that cannot be created disables caching instead of failing."""
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    
+    api = PubMedAPI(email="test@example.com", cache_dir=str(blocker / "cache"))
+    
+    assert api.cache_dir is None
+
+@patch('pubmed_paper_fetcher.pubmed_api.EFETCH_MAX_RETRIES', 0)
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_fetch_paper_details_batch_network_error_keeps_cached(mock_session_class, tmp_path):
+    """Test that cached papers are still returned when fetching the rest of the batch fails."""
+    api = PubMedAPI(email="test@example.com", cache_dir=str(tmp_path))
+    api._limiter = _RateLimiter(1000)
+    mock_session_class.return_value = FakeSession(EFETCH_XML)
+    cached = api.fetch_paper_details("12345")
+    
+    mock_session_class.return_value = FakeSession(EFETCH_XML, error=aiohttp.ClientConnectionError("offline"))
+    result = api.fetch_paper_details_batch(["12345", "99999"])
+    
+    assert result == [cached, {}]
+
+@patch('pubmed_paper_fetcher.pubmed_api.EFETCH_RETRY_BACKOFF', 0)
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_fetch_paper_details_batch_retries(mock_session_class, api):
+    """Test that rate limiting and server errors are retried until efetch succeeds."""
+    session = FakeSession(EFETCH_XML, statuses=[429, 503])
+    mock_session_class.return_value = session
+    
+    result = api.fetch_paper_details_batch(["12345", "67890"])
+    
+    assert [paper["MedlineCitation"]["PMID"] for paper in result] == ["12345", "67890"]
+    assert len(session.requests) == 3
+
+@pytest.mark.parametrize("statuses,expected_requests", [
+    ([404], 1),
+    ([500, 502, 503, 504], 4)
+])
+@patch('pubmed_paper_fetcher.pubmed_api.EFETCH_RETRY_BACKOFF', 0)
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_fetch_paper_details_batch_gives_up(mock_session_class, api, statuses, expected_requests):
+    """Test that client errors are not retried and server errors are retried a bounded number of times."""
+    session = FakeSession(EFETCH_XML, statuses=statuses)
+    mock_session_class.return_value = session
+    
+    assert api.fetch_paper_details_batch(["12345"]) == [{}]
+    assert len(session.requests) == expected_requests
+
+def test_fetch_paper_details_batch_in_running_loop(api):
+    """Test that the synchronous fetch fails clearly inside a running event loop."""
+    async def fetch_from_async_code():
+        return api.fetch_paper_details_batch(["12345"])
+    
+    with pytest.raises(RuntimeError, match="await PubMedAPI.fetch_batches_async"):
+        asyncio.run(fetch_from_async_code())
+
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_fetch_paper_details_parsed(mock_session_class, api):
+    """Test that an already-parsed record is returned without fetching or re-parsing."""
+    parsed = {"MedlineCitation": {"PMID": "12345", "Article": {"ArticleTitle": "Test Paper 1"}}}
+    
+    assert api.fetch_paper_details("12345", parsed=parsed) is parsed
+    mock_session_class.assert_not_called()
+
+def test_extract_corresponding_email(api):
+    """Test extraction of the corresponding author's email from affiliations."""
+    article = {
+        "MedlineCitation": {
+            "Article": {
+                "AuthorList": [
+                    {"LastName": "Doe", "AffiliationInfo": [{"Affiliation": "Stanford University, CA, USA"}]},
+                    {"LastName": "Smith", "AffiliationInfo": [
+                        {"Affiliation": "Pfizer Inc., New York, NY, USA. john.smith@pfizer.com"}
+                    ]}
+                ]
+            }
+        }
+    }
+    assert api.extract_corresponding_email(article) == "john.smith@pfizer.com"
+    
+    # Test with no email in any affiliation
+    article["MedlineCitation"]["Article"]["AuthorList"].pop()
+    assert api.extract_corresponding_email(article) is None
+
+def test_search_papers(api, monkeypatch):
+    """Test searching for papers."""
+    # Record Entrez calls with a spy exposing only the functions search_papers uses
+    calls = []
+    handle = io.BytesIO()
+    
+    def esearch(**kwargs):
+        calls.append(("esearch", kwargs))
+        return handle
+    
+    def read(search_handle):
+        calls.append(("read", search_handle))
+        return {"IdList": ["12345", "67890"]}
+    
+    monkeypatch.setattr("pubmed_paper_fetcher.pubmed_api.Entrez", SimpleNamespace(esearch=esearch, read=read))
+    
+    # Call the method
+    result = api.search_papers("cancer therapy", max_results=10)
+    
+    # Verify the result and the exact Entrez calls
+    assert result == ["12345", "67890"]
+    assert calls == [
+        ("esearch", {"db": "pubmed", "term": "cancer therapy", "retmax": 10}),
+        ("read", handle)
+    ]
+    assert handle.closed
+
+@patch('pubmed_paper_fetcher.pubmed_api.ESEARCH_MAX_RETMAX', 2)
+def test_search_papers_uses_history(api, monkeypatch):
+    """Test that searches larger than one esearch page go through the history server."""
+    pages = {
+        0: {"IdList": ["1", "2"], "Count": "5", "WebEnv": "WE", "QueryKey": "1"},
+        2: {"IdList": ["3", "4"]},
+        4: {"IdList": ["5"]}
+    }
+    esearch_calls = []
+    records = {}
+    
+    def esearch(**kwargs):
+        esearch_calls.append(kwargs)
+        handle = io.BytesIO()
+        records[handle] = pages[kwargs.get("retstart", 0)]
+        return handle
+    
+    monkeypatch.setattr(
+        "pubmed_paper_fetcher.pubmed_api.Entrez",
+        SimpleNamespace(esearch=esearch, read=records.__getitem__)
+    )
+    
+    # Ask for more than the server holds
+    assert api.search_papers("cancer", max_results=5000) == ["1", "2", "3", "4", "5"]
+    
+    # Verify the query is sent once and later pages reference the stored search
+    assert esearch_calls == [
+        {"db": "pubmed", "term": "cancer", "retmax": 2, "usehistory": "y"},
+        {"db": "pubmed", "webenv": "WE", "query_key": "1", "retstart": 2, "retmax": 2},
+        {"db": "pubmed", "webenv": "WE", "query_key": "1", "retstart": 4, "retmax": 1}
+    ]
+    assert all(handle.closed for handle in records)
+
+@patch('pubmed_paper_fetcher.pubmed_api.ESEARCH_MAX_RETMAX', 2)
+@patch('pubmed_paper_fetcher.pubmed_api.ESEARCH_MAX_RESULTS', 4)
+def test_search_papers_stops_at_pubmed_result_cap(api, monkeypatch, caplog):
+    """Test that paging stops at the PubMed result cap, with a warning, instead of requesting past it."""
+    pages = {
+        0: {"IdList": ["1", "2"], "Count": "7", "WebEnv": "WE", "QueryKey": "1"},
+        2: {"IdList": ["3", "4"]}
+    }
+    esearch_calls = []
+    
+    def esearch(**kwargs):
+        esearch_calls.append(kwargs)
+        return io.BytesIO(str(kwargs.get("retstart", 0)).encode())
+    
+    monkeypatch.setattr(
+        "pubmed_paper_fetcher.pubmed_api.Entrez",
+        SimpleNamespace(esearch=esearch, read=lambda handle: pages[int(handle.getvalue())])
+    )
+    
+    with caplog.at_level(logging.WARNING, logger="pubmed_paper_fetcher.pubmed_api"):
+        assert api.search_papers("cancer", max_results=6) == ["1", "2", "3", "4"]
+    
+    # No page may start at or past the cap
+    assert [call.get("retstart", 0) for call in esearch_calls] == [0, 2]
+    assert "only returns the first 4 of 7 matching papers" in caplog.text
+
+def test_search_papers_above_pubmed_result_cap(api, monkeypatch):
+    """Test that asking for more than 10,000 PMIDs makes a single esearch request for the first 10,000."""
+    pmids = [str(pmid) for pmid in range(10000)]
+    esearch_calls = []
+    
+    def esearch(**kwargs):
+        esearch_calls.append(kwargs)
+        return io.BytesIO()
+    
+    record = {"IdList": pmids, "Count": "25000", "WebEnv": "WE", "QueryKey": "1"}
+    monkeypatch.setattr(
+        "pubmed_paper_fetcher.pubmed_api.Entrez",
+        SimpleNamespace(esearch=esearch, read=lambda handle: record)
+    )
+    
+    assert api.search_papers("cancer", max_results=15000) == pmids
+    assert esearch_calls == [{"db": "pubmed", "term": "cancer", "retmax": 10000, "usehistory": "y"}]
+
+def test_rate_limiter_spaces_requests_from_the_start():
+    """Test that requests are spaced 1/rate seconds apart with no initial burst."""
+    limiter = _RateLimiter(3)
+    
+    delays = [limiter._reserve() for _ in range(7)]
+    
+    assert delays[0] == 0.0
+    assert delays[1:] == pytest.approx([n / 3 for n in range(1, 7)], abs=0.05)
+    
+    # No one-second window holds more than three requests
+    assert all(later - earlier >= 1.0 - 0.05 for earlier, later in zip(delays, delays[3:]))
+
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_esearch_and_efetch_share_rate_limiter(mock_session_class, monkeypatch):
+    """Test that esearch and efetch requests draw from the client's single rate limiter."""
+    class CountingLimiter:
+        def __init__(self):
+            self.acquired = 0
         
-        affiliation = "Harvard Medical School, Boston, MA, USA"
-        is_company, company_name = self.api.is_non_academic_affiliation(affiliation)
-        self.assertFalse(is_company)
-        self.assertIsNone(company_name)
-    
-    @patch('pubmed_paper_fetcher.pubmed_api.Entrez')
-    def test_search_papers(self, mock_entrez):
-        """Test searching for papers."""
-        # Mock Entrez.esearch and Entrez.read
-        mock_handle = MagicMock()
-        mock_entrez.esearch.return_value = mock_handle
-        mock_entrez.read.return_value = {"IdList": ["12345", "67890"]}
+        def __enter__(self):
+            self.acquired += 1
         
-        # Call the method
-        result = self.api.search_papers("cancer therapy", max_results=10)
+        def __exit__(self, *exc_info):
+            return False
         
-        # Verify the result
-        self.assertEqual(result, ["12345", "67890"])
+        async def __aenter__(self):
+            self.__enter__()
         
-        # Verify Entrez.esearch was called with the correct parameters
-        mock_entrez.esearch.assert_called_once_with(
-            db="pubmed", term="cancer therapy", retmax=10
-        )
+        async def __aexit__(self, *exc_info):
+            return False
+    
+    api = PubMedAPI(email="test@example.com")
+    limiter = CountingLimiter()
+    monkeypatch.setattr(api, "_limiter", limiter)
+    monkeypatch.setattr(
+        "pubmed_paper_fetcher.pubmed_api.Entrez",
+        SimpleNamespace(esearch=lambda **kwargs: io.BytesIO(), read=lambda handle: {"IdList": ["12345"]})
+    )
+    mock_session_class.return_value = FakeSession(EFETCH_XML)
+    
+    # Two fetches run in separate event loops but share the same bucket
+    api.fetch_paper_details_batch(api.search_papers("cancer", max_results=1))
+    api.fetch_paper_details_batch(["67890"])
+    
+    assert limiter.acquired == 3
 
-if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+@patch('pubmed_paper_fetcher.pubmed_api.aiohttp.ClientSession')
+def test_fetch_paper_details_batch(mock_session_class, api):
+    """Test fetching several papers with one streamed efetch call."""
+    # efetch returns records out of order and drops unknown PMIDs
+    session = FakeSession(EFETCH_XML)
+    mock_session_class.return_value = session
+    
+    # Call the method
+    result = api.fetch_paper_details_batch(["12345", "67890", "99999"])
+    
+    # Verify records are aligned with the requested PMIDs
+    assert len(result) == 3
+    assert result[0]["MedlineCitation"]["PMID"] == "12345"
+    assert result[1]["MedlineCitation"]["PMID"] == "67890"
+    assert result[2] == {}
+    
+    # Verify the fields used downstream were extracted
+    assert api.extract_corresponding_email(result[0]) == "john.smith@pfizer.com"
+    assert api.extract_corresponding_email(result[1]) is None
+    article = result[0]["MedlineCitation"]["Article"]
+    assert article["ArticleTitle"] == "Targeting KRAS in lung cancer"
+    assert article["Journal"]["JournalIssue"]["PubDate"] == {"Year": "2023", "Month": "Jan"}
+    assert article["AuthorList"] == [
+        {
+            "LastName": "Smith",
+            "ForeName": "John",
+            "Initials": "J",
+            "AffiliationInfo": [
+                {"Affiliation": "Pfizer Inc., New York, NY, USA. john.smith@pfizer.com"}
+            ]
+        },
+        {"CollectiveName": "KRAS Study Group"}
+    ]
+    
+    # Verify a single efetch was issued for all PMIDs
+    assert len(session.requests) == 1
+    assert session.requests[0]["id"] == "12345,67890,99999"